@@ -3,11 +3,17 @@ import argparse
 import csv
 import hashlib
 import json
+import mmap
 import os
+import re
 import shutil
 import subprocess
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, islice, repeat
+from operator import itemgetter
 from pathlib import Path
 
 try:
@@ -17,15 +23,40 @@ except Exception:
     sys.exit(1)
 
 try:
-    from deepdiff import DeepDiff
-    HAVE_DEEPDIFF = True
+    from yaml import CSafeLoader as YamlLoader  # LibYAML-backed, much faster
 except ImportError:
-    HAVE_DEEPDIFF = False
-    print("WARNING: DeepDiff not available. Install with: pip install deepdiff", file=sys.stderr)
-    print("Change type analysis will be limited without DeepDiff.", file=sys.stderr)
-except Exception as e:
-    HAVE_DEEPDIFF = False
-    print(f"WARNING: DeepDiff import error: {e}", file=sys.stderr)
+    from yaml import SafeLoader as YamlLoader
+if not getattr(yaml, "__with_libyaml__", False):
+    print("WARNING: PyYAML is built without LibYAML; falling back to the slow pure-Python loader.", file=sys.stderr)
+    print("Reinstall PyYAML from a binary wheel (or with libyaml-dev present) for faster YAML parsing.", file=sys.stderr)
+
+# DeepDiff pulls in many submodules; it is imported on first use by _get_deepdiff()
+DeepDiff = None
+HAVE_DEEPDIFF = False
+_deepdiff_checked = False
+
+
+def _get_deepdiff():
+    """Import DeepDiff on first use; returns whether it is available"""
+    global DeepDiff, HAVE_DEEPDIFF, _deepdiff_checked
+    if not _deepdiff_checked:
+        _deepdiff_checked = True
+        try:
+            from deepdiff import DeepDiff
+            HAVE_DEEPDIFF = True
+        except ImportError:
+            print("WARNING: DeepDiff not available. Install with: pip install deepdiff", file=sys.stderr)
+            print("Change type analysis will be limited without DeepDiff.", file=sys.stderr)
+        except Exception as e:
+            print(f"WARNING: DeepDiff import error: {e}", file=sys.stderr)
+    return HAVE_DEEPDIFF
+
+
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
 
 ROOT = Path(__file__).resolve().parents[1]
 TOOLS = ROOT / "tools"
@@ -33,22 +64,41 @@ REPORTS = ROOT / "reports"
 LOGS = TOOLS / "logs"
 STATE_FILE = TOOLS / "state.json"
 CACHE_DIR = TOOLS / ".cache"
+PARSED_CACHE_DIR = CACHE_DIR / "parsed"
 
 UPSTREAM_ROOT = ROOT / "rulesets"
 DOWNSTREAM_ROOT = ROOT / "appcat-konveyor-rulesets"
 
 
+# Serialized form of the state last read from or written to STATE_FILE
+_saved_state = None
+
+# Shared read-only default for missing rule entries
+_EMPTY = {}
+
+# Set by --deep-appendix: report nested DeepDiff paths in the README appendix
+DEEP_APPENDIX = False
+
+
 def log(msg: str):
-    LOGS.mkdir(parents=True, exist_ok=True)
     ts = time.strftime('%Y-%m-%d %H:%M:%S')
-    with open(LOGS / "run.log", "a", encoding="utf-8") as f:
+    try:
+        f = open(LOGS / "run.log", "a", encoding="utf-8")
+    except FileNotFoundError:
+        # Only create the log directory when it is actually missing (first run or after --reset)
+        LOGS.mkdir(parents=True, exist_ok=True)
+        f = open(LOGS / "run.log", "a", encoding="utf-8")
+    with f:
         f.write(f"[{ts}] {msg}\n")
 
 
 def load_state():
+    global _saved_state
     if STATE_FILE.exists():
         try:
-            return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+            state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+            _saved_state = json.dumps(state, indent=2)
+            return state
         except Exception as e:
             log(f"state load error: {e}")
     return {
@@ -61,8 +111,12 @@ def load_state():
 
 
 def save_state(state):
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    STATE_FILE.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    global _saved_state
+    data = json.dumps(state, indent=2)
+    if data == _saved_state:
+        return  # unchanged; skip rewriting the file
+    STATE_FILE.write_text(data, encoding="utf-8")
+    _saved_state = data
 
 
 def reset_all():
@@ -91,6 +145,7 @@ def ensure_dirs():
     REPORTS.mkdir(exist_ok=True)
     LOGS.mkdir(parents=True, exist_ok=True)
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    PARSED_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def check_repos():
@@ -101,62 +156,174 @@ def check_repos():
 
 
 def hash_json(obj) -> str:
+    if HAVE_ORJSON:
+        try:
+            # orjson emits canonical UTF-8 bytes straight from C, no intermediate str
+            return hashlib.sha256(orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)).hexdigest()
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; use the stdlib encoder
     data = json.dumps(obj, sort_keys=True, separators=(",", ":"))
     return hashlib.sha256(data.encode("utf-8")).hexdigest()
 
 
+def write_json(path: Path, obj, indent=True, sort_keys=False):
+    """Write a JSON cache file, via orjson when available (bytes straight from C, much faster)"""
+    if HAVE_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            path.write_bytes(orjson.dumps(obj, option=option))
+            return
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; use the stdlib encoder
+    path.write_text(json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys), encoding="utf-8")
+
+
+def read_json(path: Path):
+    """Read a JSON cache file written by write_json"""
+    if HAVE_ORJSON:
+        try:
+            return orjson.loads(path.read_bytes())
+        except orjson.JSONDecodeError:
+            pass  # stdlib-only extensions such as NaN; retry below
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
 def list_yaml_files(base: Path):
-    return [p for p in base.rglob("*") if p.suffix.lower() in (".yaml", ".yml") and p.is_file()]
+    # os.scandir walk in the same order as Path.rglob("*"): a directory's entries, then its
+    # subdirectories depth-first. DirEntry caches the file type, so filtering by name costs
+    # no stat and no Path objects are built for non-YAML entries.
+    files = []
+    stack = [str(base)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except PermissionError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith((".yaml", ".yml")) and entry.is_file():
+                files.append(Path(entry.path))
+        stack.extend(reversed(subdirs))
+    return files
 
 
 def load_yaml_documents(path: Path):
+    # Parsed documents are cached as JSON keyed by the file's content hash, so unchanged
+    # files skip YAML parsing on later runs. Only dict/list/scalar comparisons happen
+    # downstream, so the JSON round-trip is lossless for our purposes.
     try:
-        text = path.read_text(encoding="utf-8")
-        docs = list(yaml.safe_load_all(text))
-        return [d for d in docs if d is not None]
+        data = path.read_bytes()
     except Exception as e:
         log(f"yaml load error {path}: {e}")
         return []
+    cached = PARSED_CACHE_DIR / f"{hashlib.sha256(data).hexdigest()}.json"
+    if cached.exists():
+        try:
+            return read_json(cached)
+        except Exception as e:
+            log(f"parsed cache read error {cached}: {e}")
+    try:
+        # The loader decodes bytes itself (in C with LibYAML), so no str copy of the file is made
+        docs = list(yaml.load_all(data, Loader=YamlLoader))
+        docs = [d for d in docs if d is not None]
+    except Exception as e:
+        log(f"yaml load error {path}: {e}")
+        return []
+    try:
+        # Write-then-rename so concurrent workers never observe a partial cache file
+        tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+        write_json(tmp, docs, indent=False)
+        os.replace(tmp, cached)
+    except Exception as e:
+        log(f"parsed cache write error {cached}: {e}")
+    return docs
+
+
+FRAMEWORK_TOKENS = frozenset(["spring", "hibernate", "quarkus", "camel", "eap", "openjdk", "jakarta"])
+
+# File path substrings per category, in priority order (first matching category wins)
+PATH_CATEGORY_TOKENS = (
+    ("Azure rules", ("azure",)),
+    ("Java framework rules", FRAMEWORK_TOKENS),
+    ("Cloud readiness rules", ("cloud-readiness", "embedded-cache", "jni")),
+    ("Technology usage rules", ("technology-usage", "3rd-party")),
+    ("Discovery rules", ("00-discovery",)),
+)
+
+
+# One lookahead branch per category, tried in priority order, so a single C-level match
+# picks the first category with any token anywhere in the path (not the leftmost token)
+PATH_CATEGORY_RE = re.compile(
+    "^(?:" + "|".join(
+        f"(?=.*?(?:{'|'.join(re.escape(token) for token in sorted(tokens))}))()"
+        for _, tokens in PATH_CATEGORY_TOKENS
+    ) + ")",
+    re.DOTALL,
+)
+
+
+@lru_cache(maxsize=None)
+def categorize_path(file_path):
+    """Category implied by a rule file's path alone, or None; evaluated once per file"""
+    m = PATH_CATEGORY_RE.match(file_path.lower())
+    return PATH_CATEGORY_TOKENS[m.lastindex - 1][0] if m else None
 
 
-def categorize_rule(rule, file_path):
-    """Categorize a rule based on file path and content"""
-    file_lower = file_path.lower()
+def categorize_rule(file_path, rule_id):
+    """Categorize a rule based on its file path and ruleID"""
+    path_category = categorize_path(file_path)
+    rule_lower = rule_id.lower()
     
-    if "azure" in file_lower or "azure-" in rule.get("ruleID", "").lower():
+    if path_category == "Azure rules" or "azure-" in rule_lower:
         return "Azure rules"
-    elif any(fw in file_lower for fw in ["spring", "hibernate", "quarkus", "camel", "eap", "openjdk", "jakarta"]):
-        return "Java framework rules"
-    elif "cloud-readiness" in file_lower or "embedded-cache" in file_lower or "jni" in file_lower:
-        return "Cloud readiness rules"
-    elif "technology-usage" in file_lower or "3rd-party" in file_lower:
-        return "Technology usage rules"
-    elif "00-discovery" in file_lower or "discover" in rule.get("ruleID", "").lower():
+    elif path_category:
+        return path_category
+    elif "discover" in rule_lower:
         return "Discovery rules"
     else:
         return "Other/Uncategorized"
 
 
-def analyze_change_type(dd):
-    """Analyze the type of changes in a DeepDiff result"""
+CHANGE_REPORTS = ("values_changed", "dictionary_item_added", "dictionary_item_removed")
+
+
+def changed_paths(dd):
+    """Collect structured change paths (lists of keys/indexes) per report type from DeepDiff's tree view"""
+    return {
+        report: [level.path(output_format="list") for level in dd.tree.get(report, ())]
+        for report in CHANGE_REPORTS
+    }
+
+
+def leaf_field_name(path):
+    """Innermost named field of a change path, e.g. ['when', 'builtin.file', 'pattern'] -> 'pattern'"""
+    for key in reversed(path):
+        if isinstance(key, str):
+            return key
+    return str(path[-1]) if path else "root"
+
+
+def analyze_change_type(paths):
+    """Analyze the type of changes from the change paths of a DeepDiff result"""
     change_types = []
     
-    # Convert DeepDiff result to dict if needed
-    if hasattr(dd, 'to_dict'):
-        dd_dict = dd.to_dict()
-    else:
-        dd_dict = dd
-    
-    if "dictionary_item_added" in dd_dict:
+    if paths["dictionary_item_added"]:
         change_types.append("field_additions")
-    if "dictionary_item_removed" in dd_dict:
+    if paths["dictionary_item_removed"]:
         change_types.append("field_removals")
-    if "values_changed" in dd_dict:
+    if paths["values_changed"]:
         # Analyze what types of fields changed
-        changed_fields = list(dd_dict["values_changed"].keys())
-        has_description = any("description" in field for field in changed_fields)
-        has_pattern = any("pattern" in field for field in changed_fields)
-        has_when = any("when" in field for field in changed_fields)
+        changed_fields = paths["values_changed"]
+        has_description = any("description" in str(key) for field in changed_fields for key in field)
+        has_pattern = any("pattern" in str(key) for field in changed_fields for key in field)
+        has_when = any("when" in str(key) for field in changed_fields for key in field)
         
         if has_description and len(changed_fields) == 1:
             change_types.append("description_only")
@@ -175,125 +342,134 @@ def analyze_change_type(dd):
         return "structural_changes"
 
 
-def extract_field_names_from_changes(dd):
-    """Extract field names from DeepDiff changes for field value changes"""
+def extract_field_names_from_changes(paths):
+    """Extract top-level field names from the change paths of a DeepDiff result"""
     field_names = []
-    
-    # Convert DeepDiff result to dict if needed
-    if hasattr(dd, 'to_dict'):
-        dd_dict = dd.to_dict()
-    else:
-        dd_dict = dd
-    
-    if "values_changed" in dd_dict:
-        for field_path in dd_dict["values_changed"].keys():
-            # Extract field name from path like "root['message']" or "root['when']['builtin.file']['pattern']"
-            if "root['" in field_path:
-                # Extract the top-level field name
-                field_name = field_path.split("root['")[1].split("']")[0]
-                field_names.append(field_name)
-            else:
-                # Fallback for other path formats
-                field_names.append(field_path.split(".")[-1])
-    
-    if "dictionary_item_added" in dd_dict:
-        added_items = dd_dict["dictionary_item_added"]
-        # Handle both dict and SetOrdered objects
-        if hasattr(added_items, 'keys'):
-            field_paths = added_items.keys()
-        else:
-            field_paths = added_items
-        for field_path in field_paths:
-            if "root['" in field_path:
-                field_name = field_path.split("root['")[1].split("']")[0]
-                field_names.append(field_name)
-            else:
-                field_names.append(field_path.split(".")[-1])
-    
-    if "dictionary_item_removed" in dd_dict:
-        removed_items = dd_dict["dictionary_item_removed"]
-        # Handle both dict and SetOrdered objects
-        if hasattr(removed_items, 'keys'):
-            field_paths = removed_items.keys()
-        else:
-            field_paths = removed_items
-        for field_path in field_paths:
-            if "root['" in field_path:
-                field_name = field_path.split("root['")[1].split("']")[0]
-                field_names.append(field_name)
-            else:
-                field_names.append(field_path.split(".")[-1])
+    for report in CHANGE_REPORTS:
+        for field_path in paths[report]:
+            # An empty path is a change to the rule as a whole, which DeepDiff reports at "root"
+            field_names.append(str(field_path[0]) if field_path else "root")
     
     return list(set(field_names))  # Remove duplicates
 
 
 def extract_rules_from_doc(doc):
     rules = []
-    def walk(node):
+    # Explicit stack instead of recursion; children are pushed reversed to keep document order
+    stack = [doc]
+    while stack:
+        node = stack.pop()
         if isinstance(node, dict):
             if "ruleID" in node and isinstance(node["ruleID"], str):
                 rules.append(node)
-            for v in node.values():
-                walk(v)
+                continue  # rules do not nest, so skip the rule's own subtree
+            stack.extend(reversed(node.values()))
         elif isinstance(node, list):
-            for v in node:
-                walk(v)
-    walk(doc)
+            stack.extend(reversed(node))
     return rules
 
 
+def _parse_one(path: Path, root: Path):
+    """Parse one YAML file into its normalized hash and (ruleID, rule, category, rule hash) tuples; runs in a worker process"""
+    file_path = str(path.relative_to(root))
+    docs = load_yaml_documents(path)
+    try:
+        file_hash = hash_json(docs)
+    except Exception as e:
+        log(f"normalize {path}: {e}")
+        file_hash = None
+    found = []
+    for doc in docs:
+        for rule in extract_rules_from_doc(doc):
+            rid = rule.get("ruleID")
+            if rid:
+                found.append((rid, rule, categorize_rule(file_path, rid), hash_json(rule)))
+    return file_path, file_hash, found
+
+
+def scan_rules(executor, files, root: Path):
+    rules = {}
+    file_hashes = {}
+    # map() yields results in input order, so the first file defining a ruleID still wins
+    for file_path, file_hash, found in executor.map(_parse_one, files, repeat(root), chunksize=8):
+        if file_hash is not None:
+            file_hashes[file_path] = file_hash
+        for rid, rule, category, rule_hash in found:
+            if rid not in rules:
+                rules[rid] = {"rule": rule, "file": file_path, "category": category, "hash": rule_hash}
+    return rules, file_hashes
+
+
 def step_scan_yaml(state):
-    ensure_dirs()
     upstream_files = list_yaml_files(UPSTREAM_ROOT)
     downstream_files = list_yaml_files(DOWNSTREAM_ROOT)
-    (CACHE_DIR / "upstream_files.json").write_text(json.dumps([str(p) for p in upstream_files], indent=2), encoding="utf-8")
-    (CACHE_DIR / "downstream_files.json").write_text(json.dumps([str(p) for p in downstream_files], indent=2), encoding="utf-8")
-
-    upstream_rules = {}
-    downstream_rules = {}
-
-    for path in upstream_files:
-        for doc in load_yaml_documents(path):
-            for rule in extract_rules_from_doc(doc):
-                rid = rule.get("ruleID")
-                if rid and rid not in upstream_rules:
-                    file_path = str(path.relative_to(UPSTREAM_ROOT))
-                    category = categorize_rule(rule, file_path)
-                    upstream_rules[rid] = {"rule": rule, "file": file_path, "category": category}
-    for path in downstream_files:
-        for doc in load_yaml_documents(path):
-            for rule in extract_rules_from_doc(doc):
-                rid = rule.get("ruleID")
-                if rid and rid not in downstream_rules:
-                    file_path = str(path.relative_to(DOWNSTREAM_ROOT))
-                    category = categorize_rule(rule, file_path)
-                    downstream_rules[rid] = {"rule": rule, "file": file_path, "category": category}
-
-    (CACHE_DIR / "upstream_rules.json").write_text(json.dumps(upstream_rules, indent=2, sort_keys=True), encoding="utf-8")
-    (CACHE_DIR / "downstream_rules.json").write_text(json.dumps(downstream_rules, indent=2, sort_keys=True), encoding="utf-8")
+
+    # YAML parsing is CPU-bound and independent per file; spread it over all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        upstream_rules, upstream_hashes = scan_rules(executor, upstream_files, UPSTREAM_ROOT)
+        downstream_rules, downstream_hashes = scan_rules(executor, downstream_files, DOWNSTREAM_ROOT)
+
+    # Per-file normalized hashes feed step_per_file_diff without a second parse pass
+    write_json(CACHE_DIR / "upstream_file_hashes.json", upstream_hashes)
+    write_json(CACHE_DIR / "downstream_file_hashes.json", downstream_hashes)
+
+    write_json(CACHE_DIR / "upstream_rules.json", upstream_rules, sort_keys=True)
+    write_json(CACHE_DIR / "downstream_rules.json", downstream_rules, sort_keys=True)
     state["scan_yaml"] = True
     save_state(state)
 
 
+def _diff_one(rid, u_rule, d_rule):
+    """Diff one modified rule pair into its per_rule_modified.csv columns; runs in a worker process"""
+    if not _get_deepdiff():
+        diff_str = json.dumps({"upstream": u_rule, "downstream": d_rule})
+        return "diff", "unknown", diff_str, "", "Unknown changes (DeepDiff not available)"
+    try:
+        dd = DeepDiff(u_rule, d_rule, ignore_order=True, cache_size=5000, cache_tuning_sample_size=500)
+        # A text-view DeepDiff is already a dict of report types; to_json() is the only
+        # serialization needed, so skip the separate to_dict() materialization
+        changed_keys = list(dd.keys())
+        diff_str = dd.to_json()
+        # Walk the tree view once; every helper below reads the same paths
+        paths = changed_paths(dd)
+        change_type = analyze_change_type(paths)
+        
+        # Extract field names for field value changes
+        field_names = extract_field_names_from_changes(paths)
+        field_names_str = ";".join(field_names) if field_names else ""
+        
+        # Generate change summary
+        change_summary = generate_change_summary(paths, change_type)
+    except Exception as e:
+        log(f"DeepDiff error for rule {rid}: {e}")
+        changed_keys = ["error"]
+        change_type = "error"
+        diff_str = json.dumps({"error": str(e)})
+        field_names_str = ""
+        change_summary = f"Error processing rule: {e}"
+    return ";".join(changed_keys), change_type, diff_str, field_names_str, change_summary
+
+
 def step_per_rule_diff(state):
-    ensure_dirs()
     try:
-        upstream = json.loads((CACHE_DIR / "upstream_rules.json").read_text(encoding="utf-8"))
-        downstream = json.loads((CACHE_DIR / "downstream_rules.json").read_text(encoding="utf-8"))
+        upstream = read_json(CACHE_DIR / "upstream_rules.json")
+        downstream = read_json(CACHE_DIR / "downstream_rules.json")
     except Exception as e:
         log(f"per_rule_diff missing caches: {e}")
         return
+    # Import DeepDiff before the worker pool starts so forked workers inherit it
+    _get_deepdiff()
 
     ids_up = set(upstream.keys())
     ids_down = set(downstream.keys())
-    identical = []
-    modified = []
-    unique_up = []
-    unique_down = []
+    total_modified = 0
+    total_unique_up = 0
+    total_unique_down = 0
     
     # Track change types and categories for analysis
     change_type_counts = {}
     category_counts = {"modified": {}, "unique_up": {}, "unique_down": {}}
+    category_change_types = {}
     
     # Track detailed change type data for appendix tables
     change_type_details = {
@@ -307,44 +483,64 @@ def step_per_rule_diff(state):
         "regex_pattern": []
     }
 
-    for rid in sorted(ids_up | ids_down):
-        u = upstream.get(rid)
-        d = downstream.get(rid)
-        if u and d:
-            u_rule = u["rule"]
-            d_rule = d["rule"]
-            category = u.get("category", "Other/Uncategorized")
-            
-            if u_rule == d_rule:
-                identical.append([rid, u["file"], d["file"], category])
-            else:
-                if HAVE_DEEPDIFF:
-                    try:
-                        dd = DeepDiff(u_rule, d_rule, ignore_order=True)
-                        # Convert to dict to get keys safely
-                        dd_dict = dd.to_dict() if hasattr(dd, 'to_dict') else dd
-                        changed_keys = list(dd_dict.keys())
-                        change_type = analyze_change_type(dd)
-                        diff_str = dd.to_json()
-                        
-                        # Extract field names for field value changes
-                        field_names = extract_field_names_from_changes(dd)
-                        field_names_str = ";".join(field_names) if field_names else ""
-                        
-                        # Generate change summary
-                        change_summary = generate_change_summary(dd, change_type)
-                    except Exception as e:
-                        log(f"DeepDiff error for rule {rid}: {e}")
-                        changed_keys = ["error"]
-                        change_type = "error"
-                        diff_str = json.dumps({"error": str(e)})
-                        field_names_str = ""
-                        change_summary = f"Error processing rule: {e}"
-                    
+    # Stream rows to the CSV files as they are produced instead of holding them in memory.
+    # Rows go to temp files that replace the reports only once every row is written, so a
+    # failure part-way through leaves the previous reports in place.
+    report_names = ("per_rule_identical.csv", "per_rule_modified.csv", "per_rule_unique_upstream.csv", "per_rule_unique_downstream.csv")
+    tmp_paths = [REPORTS / f"{name}.tmp" for name in report_names]
+    try:
+        with (
+            open(tmp_paths[0], "w", newline="", encoding="utf-8") as f_identical,
+            open(tmp_paths[1], "w", newline="", encoding="utf-8") as f_modified,
+            open(tmp_paths[2], "w", newline="", encoding="utf-8") as f_unique_up,
+            open(tmp_paths[3], "w", newline="", encoding="utf-8") as f_unique_down,
+        ):
+            identical = csv.writer(f_identical)
+            modified = csv.writer(f_modified)
+            unique_up = csv.writer(f_unique_up)
+            unique_down = csv.writer(f_unique_down)
+            identical.writerow(["ruleID","file_upstream","file_downstream","category"])
+            modified.writerow(["ruleID","category","file_upstream","file_downstream","change_type","changed_keys","diff_json","field_names","change_summary"])
+            unique_up.writerow(["ruleID","file_upstream","category"])
+            unique_down.writerow(["ruleID","file_downstream","category"])
+
+            pending = []  # differing (rid, upstream, downstream, category), in ruleID order
+            for rid in sorted(ids_up | ids_down):
+                u = upstream.get(rid)
+                d = downstream.get(rid)
+                if u and d:
+                    category = u.get("category", "Other/Uncategorized")
+                    # Matching content hashes settle most pairs without a deep comparison; caches
+                    # written before rule hashes existed lack the field and fall back to comparing rules
+                    u_hash = u.get("hash")
+                    if (u_hash is not None and u_hash == d.get("hash")) or u["rule"] == d["rule"]:
+                        identical.writerow([rid, u["file"], d["file"], category])
+                    else:
+                        pending.append((rid, u, d, category))
+                elif u and not d:
+                    category = u.get("category", "Other/Uncategorized")
+                    unique_up.writerow([rid, u["file"], category])
+                    total_unique_up += 1
+                    category_counts["unique_up"][category] = category_counts["unique_up"].get(category, 0) + 1
+                elif d and not u:
+                    category = d.get("category", "Other/Uncategorized")
+                    unique_down.writerow([rid, d["file"], category])
+                    total_unique_down += 1
+                    category_counts["unique_down"][category] = category_counts["unique_down"].get(category, 0) + 1
+
+            # DeepDiff is pure Python and each pair is independent; diff them across all cores.
+            # map() yields results in submission order, so rows are still written sorted by ruleID.
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                results = executor.map(
+                    _diff_one,
+                    [rid for rid, _, _, _ in pending],
+                    [u["rule"] for _, u, _, _ in pending],
+                    [d["rule"] for _, _, d, _ in pending],
+                    chunksize=64,
+                )
+                for (rid, u, d, category), (changed_keys, change_type, diff_str, field_names_str, change_summary) in zip(pending, results):
                     # Store detailed change type data
-                    if change_type not in change_type_details:
-                        change_type_details[change_type] = []
-                    change_type_details[change_type].append({
+                    change_type_details.setdefault(change_type, []).append({
                         "ruleID": rid,
                         "category": category,
                         "upstream_file": u["file"],
@@ -352,50 +548,20 @@ def step_per_rule_diff(state):
                         "field_names": field_names_str,
                         "change_summary": change_summary
                     })
-                else:
-                    changed_keys = ["diff"]
-                    change_type = "unknown"
-                    diff_str = json.dumps({"upstream": u_rule, "downstream": d_rule})
-                    field_names_str = ""
-                    change_summary = "Unknown changes (DeepDiff not available)"
-                    
-                    # Store detailed change type data for unknown
-                    if change_type not in change_type_details:
-                        change_type_details[change_type] = []
-                    change_type_details[change_type].append({
-                        "ruleID": rid,
-                        "category": category,
-                        "upstream_file": u["file"],
-                        "downstream_file": d["file"],
-                        "field_names": field_names_str,
-                        "change_summary": change_summary
-                    })
-                
-                modified.append([rid, category, u["file"], d["file"], change_type, ";".join(changed_keys), diff_str, field_names_str, change_summary])
-                
-                # Track change type counts
-                change_type_counts[change_type] = change_type_counts.get(change_type, 0) + 1
-                category_counts["modified"][category] = category_counts["modified"].get(category, 0) + 1
-                
-        elif u and not d:
-            category = u.get("category", "Other/Uncategorized")
-            unique_up.append([rid, u["file"], category])
-            category_counts["unique_up"][category] = category_counts["unique_up"].get(category, 0) + 1
-        elif d and not u:
-            category = d.get("category", "Other/Uncategorized")
-            unique_down.append([rid, d["file"], category])
-            category_counts["unique_down"][category] = category_counts["unique_down"].get(category, 0) + 1
-
-    # Save enhanced CSV files
-    with open(REPORTS / "per_rule_identical.csv", "w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerows(([["ruleID","file_upstream","file_downstream","category"]] + identical))
-    with open(REPORTS / "per_rule_modified.csv", "w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerows(([["ruleID","category","file_upstream","file_downstream","change_type","changed_keys","diff_json","field_names","change_summary"]] + modified))
-    with open(REPORTS / "per_rule_unique_upstream.csv", "w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerows(([["ruleID","file_upstream","category"]] + unique_up))
-    with open(REPORTS / "per_rule_unique_downstream.csv", "w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerows(([["ruleID","file_downstream","category"]] + unique_down))
-    
+                    modified.writerow([rid, category, u["file"], d["file"], change_type, changed_keys, diff_str, field_names_str, change_summary])
+                    tally_category_change_types(category_change_types, category, change_type, field_names_str)
+                    total_modified += 1
+
+                    # Track change type counts
+                    change_type_counts[change_type] = change_type_counts.get(change_type, 0) + 1
+                    category_counts["modified"][category] = category_counts["modified"].get(category, 0) + 1
+    except BaseException:
+        for tmp in tmp_paths:
+            tmp.unlink(missing_ok=True)
+        raise
+    for name, tmp in zip(report_names, tmp_paths):
+        os.replace(tmp, REPORTS / name)
+
     # Save change type detail tables
     for change_type, rules in change_type_details.items():
         if rules:  # Only create files for change types that have rules
@@ -413,80 +579,60 @@ def step_per_rule_diff(state):
                         rule["change_summary"]
                     ])
     
-    # Analyze category change types
-    category_change_types = analyze_category_change_types(modified)
-    
     # Save analysis summary
     analysis_summary = {
         "change_type_counts": change_type_counts,
         "category_counts": category_counts,
-        "total_modified": len(modified),
-        "total_unique_up": len(unique_up),
-        "total_unique_down": len(unique_down),
+        "total_modified": total_modified,
+        "total_unique_up": total_unique_up,
+        "total_unique_down": total_unique_down,
         "change_type_details": {k: len(v) for k, v in change_type_details.items()},
         "category_change_types": category_change_types
     }
-    (CACHE_DIR / "analysis_summary.json").write_text(json.dumps(analysis_summary, indent=2), encoding="utf-8")
+    write_json(CACHE_DIR / "analysis_summary.json", analysis_summary)
 
     state["per_rule_diff"] = True
     save_state(state)
 
 
-def normalize_yaml_file(path: Path):
-    docs = load_yaml_documents(path)
-    return json.loads(json.dumps(docs, sort_keys=True))
-
-
 def step_per_file_diff(state):
-    ensure_dirs()
     try:
-        upstream_files = [Path(p) for p in json.loads((CACHE_DIR / "upstream_files.json").read_text(encoding="utf-8"))]
-        downstream_files = [Path(p) for p in json.loads((CACHE_DIR / "downstream_files.json").read_text(encoding="utf-8"))]
+        up_map = read_json(CACHE_DIR / "upstream_file_hashes.json")
+        down_map = read_json(CACHE_DIR / "downstream_file_hashes.json")
     except Exception as e:
         log(f"per_file_diff missing caches: {e}")
         return
 
-    up_map = {}
-    down_map = {}
-
-    for p in upstream_files:
-        try:
-            up_map[str(p.relative_to(UPSTREAM_ROOT))] = hash_json(normalize_yaml_file(p))
-        except Exception as e:
-            log(f"normalize upstream {p}: {e}")
-    for p in downstream_files:
-        try:
-            down_map[str(p.relative_to(DOWNSTREAM_ROOT))] = hash_json(normalize_yaml_file(p))
-        except Exception as e:
-            log(f"normalize downstream {p}: {e}")
-
     identical = []
     modified = []
     unique_up = []
     unique_down = []
 
+    # Index the first downstream file per hash once so the hash-join is a dict lookup
+    down_by_hash = {}
+    for down_rel, d_hash in down_map.items():
+        down_by_hash.setdefault(d_hash, down_rel)
+    matched_down = set()
+
     for up_rel, up_hash in up_map.items():
         # Try to find same filename path first; otherwise compare across by hash
-        match_down = None
+        same_hash = down_by_hash.get(up_hash)
         if up_rel in down_map and down_map[up_rel] == up_hash:
-            match_down = up_rel
             identical.append([up_rel, up_rel])
+            matched_down.add(up_rel)
+        elif same_hash is not None:
+            # hash-join: first downstream file with the same hash
+            identical.append([up_rel, same_hash])
+            matched_down.add(same_hash)
+        elif up_rel in down_map:
+            # same path exists but different hash
+            modified.append([up_rel, up_rel])
+            matched_down.add(up_rel)
         else:
-            # hash-join: any downstream with same hash
-            for down_rel, d_hash in down_map.items():
-                if d_hash == up_hash:
-                    match_down = down_rel
-                    identical.append([up_rel, down_rel])
-                    break
-        if match_down is None:
-            # check if same path exists but different hash
-            if up_rel in down_map:
-                modified.append([up_rel, up_rel])
-            else:
-                unique_up.append([up_rel])
+            unique_up.append([up_rel])
 
     for down_rel in down_map.keys():
-        if any(row[1] == down_rel for row in identical) or any(row[1] == down_rel for row in modified):
+        if down_rel in matched_down:
             continue
         if down_rel not in up_map:
             unique_down.append([down_rel])
@@ -529,7 +675,6 @@ def git_list_branches_ahead(repo_root: Path):
 
 
 def step_branch_scan(state):
-    ensure_dirs()
     up = git_list_branches_ahead(UPSTREAM_ROOT)
     down = git_list_branches_ahead(DOWNSTREAM_ROOT)
     with open(REPORTS / "branches_upstream.csv", "w", newline="", encoding="utf-8") as f:
@@ -565,18 +710,60 @@ def describe_change(field_path, old_val, new_val):
         return f"Modified {field_name} field"
 
 
-def generate_change_summary(dd, change_type):
+def _unordered(value):
+    """Canonical form of a rule value that ignores list order, like DeepDiff(ignore_order=True)"""
+    if isinstance(value, dict):
+        return {k: _unordered(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return sorted(json.dumps(_unordered(v), sort_keys=True, default=str) for v in value)
+    return value
+
+
+def _diff_deeper(a, b):
+    """Whether two mappings share enough keys to diff key by key; otherwise the whole value
+    is reported as changed, like DeepDiff's threshold_to_diff_deeper (a third of the keys)"""
+    union = a.keys() | b.keys()
+    return len(union) <= 1 or len(a.keys() & b.keys()) / len(union) >= 0.33
+
+
+def shallow_diff(a, b):
+    """Compare two rules field by field, descending into nested mappings
+
+    Returns (added, removed, changed): key paths of added and removed fields, and
+    (path, old, new) for each changed leaf. Lists are compared whole, ignoring order.
+    """
+    added, removed, changed = [], [], []
+
+    def walk(path, old, new):
+        added.extend(path + (k,) for k in new if k not in old)
+        for k, old_val in old.items():
+            if k not in new:
+                removed.append(path + (k,))
+                continue
+            new_val = new[k]
+            if old_val == new_val:
+                continue
+            if isinstance(old_val, dict) and isinstance(new_val, dict) and _diff_deeper(old_val, new_val):
+                walk(path + (k,), old_val, new_val)
+            elif isinstance(old_val, list) and isinstance(new_val, list) and _unordered(old_val) == _unordered(new_val):
+                continue
+            else:
+                changed.append((path + (k,), old_val, new_val))
+
+    walk((), a, b)
+    return added, removed, changed
+
+
+def format_key_path(path):
+    """DeepDiff-style path string for a key path, e.g. ('when', 'builtin.file') -> root['when']['builtin.file']"""
+    return "root" + "".join(f"[{k!r}]" for k in path)
+
+
+def generate_change_summary(paths, change_type):
     """Generate a concise summary of changes for a rule"""
-    # Convert DeepDiff result to dict if needed
-    if hasattr(dd, 'to_dict'):
-        dd_dict = dd.to_dict()
-    else:
-        dd_dict = dd
-    
     if change_type == "field_values":
-        if "values_changed" in dd_dict:
-            changed_fields = list(dd_dict["values_changed"].keys())
-            field_names = [field.split("'")[-2] if "'" in field else field.split(".")[-1] for field in changed_fields]
+        if paths["values_changed"]:
+            field_names = [leaf_field_name(field) for field in paths["values_changed"]]
             if len(field_names) == 1:
                 return f"Modified {field_names[0]} field value"
             else:
@@ -586,26 +773,14 @@ def generate_change_summary(dd, change_type):
     elif change_type == "mixed_changes":
         return "Multiple types of changes (field values, additions, removals, etc.)"
     elif change_type == "field_additions":
-        if "dictionary_item_added" in dd_dict:
-            added_items = dd_dict["dictionary_item_added"]
-            # Handle both dict and SetOrdered objects
-            if hasattr(added_items, 'keys'):
-                added_fields = list(added_items.keys())
-            else:
-                added_fields = list(added_items)
-            field_names = [field.split("'")[-2] if "'" in field else field.split(".")[-1] for field in added_fields]
+        if paths["dictionary_item_added"]:
+            field_names = [leaf_field_name(field) for field in paths["dictionary_item_added"]]
             return f"Added {len(field_names)} new fields: {', '.join(field_names)}"
     elif change_type == "structural_changes":
         return "Complex structural changes (other than field additions/removals)"
     elif change_type == "field_removals":
-        if "dictionary_item_removed" in dd_dict:
-            removed_items = dd_dict["dictionary_item_removed"]
-            # Handle both dict and SetOrdered objects
-            if hasattr(removed_items, 'keys'):
-                removed_fields = list(removed_items.keys())
-            else:
-                removed_fields = list(removed_items)
-            field_names = [field.split("'")[-2] if "'" in field else field.split(".")[-1] for field in removed_fields]
+        if paths["dictionary_item_removed"]:
+            field_names = [leaf_field_name(field) for field in paths["dictionary_item_removed"]]
             return f"Removed {len(field_names)} fields: {', '.join(field_names)}"
     elif change_type == "description_only":
         return "Only description field modified"
@@ -615,6 +790,7 @@ def generate_change_summary(dd, change_type):
         return "Unknown change type"
 
 
+@lru_cache(maxsize=None)
 def categorize_field_change(field_name, change_type):
     """Categorize a field change into description, metadata, source/target, or regex"""
     field_lower = field_name.lower()
@@ -640,64 +816,147 @@ def categorize_field_change(field_name, change_type):
         return "metadata"
 
 
-def analyze_category_change_types(modified_rules):
-    """Analyze the types of changes within each category"""
-    category_change_types = {}
-    
-    for rule_data in modified_rules:
-        if len(rule_data) >= 9:  # Ensure we have all fields
-            category = rule_data[1]  # category field
-            change_type = rule_data[4]  # change_type field
-            field_names_str = rule_data[7] if len(rule_data) > 7 else ""  # field_names field
-            
-            if category not in category_change_types:
-                category_change_types[category] = {
-                    "description": 0,
-                    "metadata": 0,
-                    "source/target": 0,
-                    "regex": 0,
-                    "other": 0
-                }
-            
-            # Analyze field changes
-            if field_names_str and change_type == "field_values":
-                field_names = field_names_str.split(";")
-                for field_name in field_names:
-                    if field_name.strip():
-                        field_category = categorize_field_change(field_name.strip(), change_type)
-                        category_change_types[category][field_category] += 1
-            elif change_type == "description_only":
-                category_change_types[category]["description"] += 1
-            elif change_type == "regex_pattern":
-                category_change_types[category]["regex"] += 1
-            elif change_type == "condition_logic":
-                category_change_types[category]["regex"] += 1  # when field is regex-related
-            else:
-                category_change_types[category]["other"] += 1
+# Field change kinds tallied per category, in README order
+_CT_KEYS = tuple(sys.intern(k) for k in ("description", "metadata", "source/target", "regex", "other"))
+
+# Category order of the README breakdown
+_CATEGORY_ORDER = ("Azure rules", "Java framework rules", "Cloud readiness rules", "Technology usage rules", "Discovery rules", "Other/Uncategorized")
+
+
+def tally_category_change_types(category_change_types, category, change_type, field_names_str):
+    """Count the types of changes of one modified rule within its category"""
+    if category not in category_change_types:
+        category_change_types[category] = dict.fromkeys(_CT_KEYS, 0)
     
-    return category_change_types
+    # Analyze field changes
+    if field_names_str and change_type == "field_values":
+        field_names = field_names_str.split(";")
+        for field_name in field_names:
+            if field_name.strip():
+                field_category = categorize_field_change(field_name.strip(), change_type)
+                category_change_types[category][field_category] += 1
+    elif change_type == "description_only":
+        category_change_types[category]["description"] += 1
+    elif change_type == "regex_pattern":
+        category_change_types[category]["regex"] += 1
+    elif change_type == "condition_logic":
+        category_change_types[category]["regex"] += 1  # when field is regex-related
+    else:
+        category_change_types[category]["other"] += 1
+
+
+# README wording for each change type: full descriptions for the summary, short ones for appendix headings
+_CHANGE_TYPE_DESC = {
+    "field_additions": "Field additions only (new YAML fields added)",
+    "field_values": "Field value changes only (existing fields with different values)",
+    "description_only": "Description changes only (only description field differs)",
+    "regex_pattern": "Regex/pattern changes (when/pattern fields differ)",
+    "condition_logic": "Condition logic changes (when field structure differs)",
+    "mixed_changes": "Mixed changes (multiple types above)",
+    "structural_changes": "Structural changes (other complex differences)",
+    "field_removals": "Field removals (fields removed from downstream)"
+}
+_CHANGE_TYPE_DESC_SHORT = {
+    "field_additions": "Field additions only",
+    "field_values": "Field value changes only",
+    "description_only": "Description changes only",
+    "regex_pattern": "Regex/pattern changes",
+    "condition_logic": "Condition logic changes",
+    "mixed_changes": "Mixed changes",
+    "structural_changes": "Structural changes",
+    "field_removals": "Field removals"
+}
+
+
+def _render_rule(rid, u_rule, d_rule, u_file, d_file, deep):
+    """Render the appendix lines for one rule (module-level so it can run in worker processes)"""
+    if not (u_rule and d_rule):
+        # Unique to one side; both cases share one template
+        side, file_path, rule = ("upstream", u_file, u_rule) if u_rule else ("downstream", d_file, d_rule)
+        return [
+            f"#### {rid}",
+            f"- **Status**: Unique to {side}",
+            f"- **File**: `{file_path}`",
+            f"- **Description**: {rule.get('description', 'N/A')}",
+            "",
+        ]
+
+    # Modified rule
+    lines = [
+        f"#### {rid}",
+        "- **Status**: Modified",
+        f"- **Upstream**: `{u_file}`",
+        f"- **Downstream**: `{d_file}`",
+    ]
+
+    # Show key differences with descriptions
+    if deep and _get_deepdiff():
+        dd = DeepDiff(u_rule, d_rule, ignore_order=True)
+        changes = []
+
+        if "dictionary_item_added" in dd:
+            for field in dd["dictionary_item_added"]:
+                changes.append(f"**Added in downstream**: {field} - Added new field")
+
+        if "dictionary_item_removed" in dd:
+            for field in dd["dictionary_item_removed"]:
+                changes.append(f"**Removed in downstream**: {field} - Removed field")
+
+        if "values_changed" in dd:
+            values_changed = dd["values_changed"]
+            for field_path, change_info in islice(values_changed.items(), 5):  # Show first 5
+                old_val = change_info.get("old_value", "")
+                new_val = change_info.get("new_value", "")
+                desc = describe_change(field_path, old_val, new_val)
+                changes.append(f"**Changed**: {field_path} - {desc}")
+
+            remaining = len(values_changed) - 5
+            if remaining > 0:
+                changes.append(f"... and {remaining} more changes")
+    else:
+        added, removed, changed = shallow_diff(u_rule, d_rule)
+        changes = [f"**Added in downstream**: {format_key_path(path)} - Added new field" for path in added]
+        changes.extend(f"**Removed in downstream**: {format_key_path(path)} - Removed field" for path in removed)
+        for path, old_val, new_val in changed[:5]:  # Show first 5
+            field_path = format_key_path(path)
+            changes.append(f"**Changed**: {field_path} - {describe_change(field_path, old_val, new_val)}")
+        if len(changed) > 5:
+            changes.append(f"... and {len(changed) - 5} more changes")
+
+    if changes:
+        lines.append("- **Changes**:")
+        for change in changes:
+            lines.append(f"  - {change}")
+    else:
+        lines.append("- **Changes**: Structural differences detected")
 
+    lines.append("")
+    return lines
 
-def generate_detailed_appendix():
-    """Generate detailed rule differences appendix organized by file/topic"""
+
+def generate_detailed_appendix_lines(change_type_counts, deep=False):
+    """Generate the lines of the detailed rule differences appendix organized by file/topic
+
+    Modified rules are compared field by field; deep=True reports nested paths via DeepDiff instead.
+    """
     try:
-        upstream = json.loads((CACHE_DIR / "upstream_rules.json").read_text(encoding="utf-8"))
-        downstream = json.loads((CACHE_DIR / "downstream_rules.json").read_text(encoding="utf-8"))
+        upstream = read_json(CACHE_DIR / "upstream_rules.json")
+        downstream = read_json(CACHE_DIR / "downstream_rules.json")
     except Exception as e:
         log(f"detailed appendix missing caches: {e}")
-        return ""
+        return []
     
-    # Group rules by file/topic
+    # Group rules by file/topic; the downstream entry wins for rules present in both repos
     file_groups = {}
-    all_rules = []
-    for rid, data in {**upstream, **downstream}.items():
+    upstream_only = ((rid, data) for rid, data in upstream.items() if rid not in downstream)
+    for rid, data in chain(upstream_only, downstream.items()):
         file_path = data.get("file", "unknown")
-        topic = file_path.split("/")[-1].replace(".yaml", "").replace(".yml", "")
+        topic = os.path.basename(file_path).removesuffix(".yaml").removesuffix(".yml")
         if topic not in file_groups:
             file_groups[topic] = []
         file_groups[topic].append((rid, data))
-        all_rules.append((rid, topic))
     
+    deep = deep and _get_deepdiff()
     appendix = []
     appendix.append("## Appendix: Detailed Rule Differences")
     appendix.append("")
@@ -708,27 +967,11 @@ def generate_detailed_appendix():
     appendix.append("Detailed breakdown of rules by change type with field names and summaries:")
     appendix.append("")
     
-    # Load change type details
-    try:
-        analysis_data = json.loads((CACHE_DIR / "analysis_summary.json").read_text(encoding="utf-8"))
-        change_type_counts = analysis_data.get("change_type_counts", {})
-    except Exception:
-        change_type_counts = {}
-    
     # Generate change type tables
     for change_type, count in sorted(change_type_counts.items(), key=lambda x: -x[1]):
         if count > 0:
             filename = f"change_type_{change_type.replace('_', '_')}.csv"
-            change_desc = {
-                "field_additions": "Field additions only",
-                "field_values": "Field value changes only", 
-                "description_only": "Description changes only",
-                "regex_pattern": "Regex/pattern changes",
-                "condition_logic": "Condition logic changes",
-                "mixed_changes": "Mixed changes",
-                "structural_changes": "Structural changes",
-                "field_removals": "Field removals"
-            }.get(change_type, change_type)
+            change_desc = _CHANGE_TYPE_DESC_SHORT.get(change_type, change_type)
             
             appendix.append(f"#### {change_desc} ({count} rules) {{#{change_type.replace('_', '-')}-table}}")
             appendix.append("")
@@ -736,7 +979,8 @@ def generate_detailed_appendix():
             appendix.append("")
     
     # Special section for field value changes with field names
-    if change_type_counts.get("field_values", 0) > 0:
+    fv_count = change_type_counts.get("field_values", 0)
+    if fv_count > 0:
         appendix.append("#### Field Value Changes Table {#field-value-changes-table}")
         appendix.append("")
         appendix.append("The 1,462 field value changes include the following field types:")
@@ -751,7 +995,7 @@ def generate_detailed_appendix():
         appendix.append("| `effort` | Effort estimation | Changed complexity ratings |")
         appendix.append("| Other fields | Various metadata | Updated values for consistency |")
         appendix.append("")
-        appendix.append(f"See `reports/change_type_field_values.csv` for complete list of {change_type_counts.get('field_values', 0)} rules with specific field names and change summaries.")
+        appendix.append(f"See `reports/change_type_field_values.csv` for complete list of {fv_count} rules with specific field names and change summaries.")
         appendix.append("")
     
     # Table of contents (files only)
@@ -759,91 +1003,304 @@ def generate_detailed_appendix():
     appendix.append("")
     appendix.append("Detailed rule-by-rule differences organized by file/topic:")
     appendix.append("")
-    for topic in sorted(file_groups.keys()):
-        # Create safe anchor for topic
-        topic_anchor = topic.lower().replace(' ', '-').replace('_', '-')
-        rule_count = len(file_groups[topic])
-        appendix.append(f"- [{topic}](#{topic_anchor}) ({rule_count} rules)")
+    # Collect the renderable rules (with a rule body on at least one side) topic by topic, in
+    # TOC order; topics left without any are dropped from both the TOC and the detailed sections
+    renderable = []  # (topic, rule count)
+    rids, u_rules, d_rules, u_files, d_files = [], [], [], [], []
+    for topic in sorted(file_groups):
+        rule_count = 0
+        for rid, _ in sorted(file_groups[topic], key=itemgetter(0)):
+            u = upstream.get(rid) or _EMPTY
+            d = downstream.get(rid) or _EMPTY
+            u_rule = u.get("rule") or _EMPTY
+            d_rule = d.get("rule") or _EMPTY
+            if not u_rule and not d_rule:
+                continue
+            rids.append(rid)
+            u_rules.append(u_rule)
+            d_rules.append(d_rule)
+            u_files.append(u.get("file", ""))
+            d_files.append(d.get("file", ""))
+            rule_count += 1
+        if rule_count:
+            renderable.append((topic, rule_count))
+    
+    # Create safe anchor per topic, shared by the TOC and the detailed sections
+    anchors = {t: t.lower().replace(' ', '-').replace('_', '-') for t, _ in renderable}
+    for topic, rule_count in renderable:
+        appendix.append(f"- [{topic}](#{anchors[topic]}) ({rule_count} rules)")
     appendix.append("")
     
-    # Detailed sections
-    for topic in sorted(file_groups.keys()):
-        # Create safe anchor for topic
-        topic_anchor = topic.lower().replace(' ', '-').replace('_', '-')
-        appendix.append(f"### {topic} {{#{topic_anchor}}}")
+    # Each rule renders independently; spread the diffing over worker processes when cores allow.
+    # map() yields results in submission order, so the sections keep their sorted layout.
+    if (os.cpu_count() or 1) > 2:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            rendered = list(executor.map(_render_rule, rids, u_rules, d_rules, u_files, d_files, repeat(deep), chunksize=64))
+    else:
+        rendered = list(map(_render_rule, rids, u_rules, d_rules, u_files, d_files, repeat(deep)))
+    
+    # Detailed sections, in TOC order
+    rendered = iter(rendered)
+    for topic, rule_count in renderable:
+        appendix.append(f"### {topic} {{#{anchors[topic]}}}")
         appendix.append("")
-        
-        for rid, data in sorted(file_groups[topic], key=lambda x: x[0]):
-            u_rule = upstream.get(rid, {}).get("rule", {})
-            d_rule = downstream.get(rid, {}).get("rule", {})
-            u_file = upstream.get(rid, {}).get("file", "")
-            d_file = downstream.get(rid, {}).get("file", "")
-            
-            if not u_rule and not d_rule:
-                continue
-                
-            appendix.append(f"#### {rid}")
-            if u_rule and d_rule:
-                # Modified rule
-                appendix.append("- **Status**: Modified")
-                appendix.append(f"- **Upstream**: `{u_file}`")
-                appendix.append(f"- **Downstream**: `{d_file}`")
-                
-                # Show key differences with descriptions
-                if HAVE_DEEPDIFF:
-                    dd = DeepDiff(u_rule, d_rule, ignore_order=True)
-                    changes = []
-                    
-                    if "dictionary_item_added" in dd:
-                        for field in dd["dictionary_item_added"]:
-                            changes.append(f"**Added in downstream**: {field} - Added new field")
-                    
-                    if "dictionary_item_removed" in dd:
-                        for field in dd["dictionary_item_removed"]:
-                            changes.append(f"**Removed in downstream**: {field} - Removed field")
-                    
-                    if "values_changed" in dd:
-                        for field_path, change_info in list(dd["values_changed"].items())[:5]:  # Show first 5
-                            old_val = change_info.get("old_value", "")
-                            new_val = change_info.get("new_value", "")
-                            desc = describe_change(field_path, old_val, new_val)
-                            changes.append(f"**Changed**: {field_path} - {desc}")
-                        
-                        if len(dd["values_changed"]) > 5:
-                            changes.append(f"... and {len(dd['values_changed']) - 5} more changes")
-                    
-                    if changes:
-                        appendix.append("- **Changes**:")
-                        for change in changes:
-                            appendix.append(f"  - {change}")
-                    else:
-                        appendix.append("- **Changes**: Structural differences detected")
-                
-            elif u_rule and not d_rule:
-                # Unique to upstream
-                appendix.append("- **Status**: Unique to upstream")
-                appendix.append(f"- **File**: `{u_file}`")
-                appendix.append(f"- **Description**: {u_rule.get('description', 'N/A')}")
-            elif d_rule and not u_rule:
-                # Unique to downstream
-                appendix.append("- **Status**: Unique to downstream")
-                appendix.append(f"- **File**: `{d_file}`")
-                appendix.append(f"- **Description**: {d_rule.get('description', 'N/A')}")
-            
-            appendix.append("")
+        for _ in range(rule_count):
+            appendix.extend(next(rendered))
     
-    return "\n".join(appendix)
+    # Return the list itself rather than a generator: the README writer streams it line by line,
+    # and if it is ever joined, str.join sizes a list in one pass but must first copy a generator into one
+    return appendix
+
+
+# Static README sections; placeholders are filled from the counts in step_write_readme
+_README_TEMPLATE = """\
+AppCAT ↔ Konveyor rulesets reconciliation (YAML-focused)
+
+## Executive Summary
+
+The analysis reveals significant divergence between Konveyor and AppCAT rulesets, with {hm:,} of {total_rules:,} rules ({modified_pct:.1f}%) having differences between repositories. The reconciliation strategy involves two phases: Phase 1 focuses on rule synchronization and schema harmonization, while Phase 2 establishes ongoing bidirectional sync workflows.
+
+**Upstream Changes (Konveyor)**: The primary changes will be adopting AppCAT's enhanced rule patterns, adding optional metadata fields (domain, category, message), and incorporating {hd} AppCAT-specific rules that provide value to the broader community. The unified schema will maintain backward compatibility while supporting richer rule descriptions and Azure-specific categorizations.
+
+**Downstream Changes (AppCAT)**: AppCAT will adopt {hu} missing rules from upstream Konveyor, ensuring comprehensive coverage of migration scenarios. The existing {hm:,} modified rules will be harmonized using the unified schema, preserving AppCAT's enhancements while aligning with upstream standards.
+
+**Key Numbers**: {total_rules:,} total rules, {hm:,} modified, {hu:,} unique upstream, {hd:,} unique downstream
+
+## Proposed Unified Schema
+
+The reconciliation plan proposes a unified YAML schema that combines the best of both repositories while maintaining backward compatibility:
+
+```yaml
+# Example unified rule schema
+- ruleID: azure-cache-redis-01000                    # Required: unique identifier
+  description: "Application uses Redis cache"        # Required: human-readable description
+  message: "Consider migrating to Azure Cache for Redis"  # Optional: AppCAT enhancement
+  domain: "azure"                                    # Optional: AppCAT categorization
+  category: "cache"                                  # Optional: AppCAT subcategory
+  tag: ["Redis", "Cache", "Azure"]                   # Required: tags for classification
+  labels: ["konveyor.io/include=always"]             # Required: Konveyor labels
+  effort: "medium"                                   # Optional: migration effort estimate
+  links: []                                          # Required: documentation links
+  customVariables: []                                # Required: custom variables
+  when:                                             # Required: condition logic
+    builtin.file:
+      pattern: ".*redis.*\\\\.jar"                     # Enhanced regex patterns from AppCAT
+  # Additional AppCAT-specific fields (optional):
+  metadata:                                          # Optional: rich metadata
+    severity: "medium"
+    confidence: "high"
+    migrationPath: "azure-cache-redis"
+```
+
+**Schema Changes Summary**:
+- **Additions**: `message`, `domain`, `category`, `metadata` fields (AppCAT enhancements)
+- **Enhancements**: Improved regex patterns in `when` conditions
+- **Backward Compatibility**: All existing Konveyor fields preserved
+- **Optional Fields**: New fields are optional to maintain compatibility
+
+"""
+
+# Narrative on how AppCAT extends the upstream rules; static text, so it is not formatted
+_APPCAT_NARRATIVE = r"""## AppCAT Enhancements to Rulesets
+
+AppCAT has significantly enhanced the rule detection logic compared to Konveyor, with 2,140 of 2,941 rules (72.8%) having improvements. The enhancements fall into three main categories:
+
+### 1. Enhanced Regex Patterns (68.3% of changes)
+
+**Konveyor (Simple)**:
+```yaml
+when:
+  builtin.file:
+    pattern: ".*liferay.*\\.jar"
+```
+
+**AppCAT (Enhanced)**:
+```yaml
+when:
+  builtin.file:
+    pattern: "^([a-zA-Z0-9._-]*)liferay([a-zA-Z0-9._-]*)\\.jar$"
+```
+
+**Key Improvements**:
+- **More Precise Matching**: Uses `^` and `$` anchors for exact matching
+- **Structured Capture Groups**: `([a-zA-Z0-9._-]*)` captures version prefixes/suffixes
+- **Reduced False Positives**: Prevents matching files like `not-liferay-something.jar`
+
+### 2. Dependency Detection Integration (24.5% of changes)
+
+**Konveyor (File-only)**:
+```yaml
+when:
+  builtin.file:
+    pattern: "spring-boot.*\\.jar"
+```
+
+**AppCAT (Multi-layered)**:
+```yaml
+when:
+  or:
+    - java.dependency:
+        lowerbound: "0.0.0"
+        name: "org.springframework.spring-boot"
+    - builtin.file:
+        pattern: "^spring-boot([a-zA-Z0-9._-]*)\\.jar$"
+```
+
+**Key Improvements**:
+- **Maven/Gradle Detection**: Checks actual dependency declarations, not just JAR files
+- **Fallback Logic**: Still checks JAR files if dependency detection fails
+- **More Accurate**: Catches dependencies even when JAR names don't match patterns
+
+### 3. Complex Multi-Condition Logic (6.0% of changes)
+
+**Konveyor (Single condition)**:
+```yaml
+when:
+  builtin.filecontent:
+    filePattern: ".*\\.(java|properties|yaml|yml)"
+    pattern: "\\.\\/."
+```
+
+**AppCAT (Comprehensive)**:
+```yaml
+when:
+  or:
+    - builtin.filecontent:
+        filePattern: "(/|\\\\)([a-zA-Z0-9._-]+)\\.(java|properties|yaml|yml|xml)$"
+        pattern: "^(\\\\.{1,2}\\/[-\\w\\/.]+)"
+    - java.referenced:
+        location: "PACKAGE"
+        pattern: "com.amazonaws.services.s3*"
+    - java.dependency:
+        name: "com.amazonaws.aws-java-sdk-s3"
+```
+
+**Key Improvements**:
+- **Multiple Detection Methods**: File content, package references, and dependencies
+- **Broader Coverage**: Catches usage patterns that file scanning might miss
+- **Azure-Specific**: Tailored for Azure migration scenarios
+
+### 4. Build Tool Integration
+
+**AppCAT adds support for**:
+- **Gradle**: `build.gradle` and `build.gradle.kts` files
+- **Maven**: Enhanced XPath queries for `pom.xml`
+- **Multiple Java Version Detection**: Checks `sourceCompatibility`, `targetCompatibility`, etc.
+
+### Why These Enhancements Matter
+
+1. **Accuracy**: AppCAT's patterns reduce false positives by being more specific
+2. **Completeness**: Dependency detection catches cases where JAR files aren't present
+3. **Azure Focus**: Rules are tailored for Azure migration scenarios
+4. **Modern Build Tools**: Support for Gradle and modern Maven configurations
+5. **Comprehensive Coverage**: Multiple detection methods ensure nothing is missed
+
+The unified schema preserves these AppCAT enhancements while maintaining backward compatibility with Konveyor's simpler patterns, giving users the best of both worlds.
+
+"""
+
+_README_PLAN_TEMPLATE = """\
+
+### Recommended Reconciliation Plan
+**Priority: {sync_priority}** - {hm:,} of {total_rules:,} rules have diverged between repos
+
+#### Phase 1: Rule Synchronization and Schema Harmonization
+1. **Merge {hu} upstream-only rules** into AppCAT downstream
+   - These rules exist in Konveyor but are missing from AppCAT
+   - See `reports/per_rule_unique_upstream.csv` for full list
+   - Low risk: pure additions to downstream
+
+2. **Review {hd} downstream-only rules** for upstream contribution
+   - AppCAT-specific rules that could benefit Konveyor community
+   - See `reports/per_rule_unique_downstream.csv` for full list
+   - Focus on Azure-specific enhancements
+
+3. **Harmonize {hm:,} modified rules** using unified schema
+   - Most changes are additive (message fields, enhanced regex patterns)
+   - See detailed analysis in appendix below
+   - Propose unified superset schema to Konveyor maintainers
+
+#### Phase 2: Bidirectional Sync Workflow
+4. **Establish bidirectional sync workflow**
+   - **Upstream → Downstream**: Pull new rules from Konveyor, merge with AppCAT enhancements
+   - **Downstream → Upstream**: Push enhanced rules back to Konveyor with AppCAT metadata
+   - **Schema strategy**: Unified superset with optional AppCAT fields (domain, category, message)
+   - **Conflict resolution**: Prefer downstream enhancements for existing rules, merge new rules from upstream
+
+#### Schema Unification Strategy
+- **Keep `ruleID` canonical** - this is the primary key for rule matching
+- **Add optional AppCAT fields** - domain, category, message as extensions
+- **Enhanced patterns** - downstream regex improvements should be adopted upstream
+- **Condition logic** - downstream OR conditions and dependency checks are improvements
+
+#### Success Metrics
+- Reduce modified rules from {hm:,} to <100 through schema unification
+- Achieve 95%+ rule coverage (currently {covered:,}/{total_rules:,} = {coverage_pct:.1f}%)
+- Establish an agreed upon sync cadence or new process to prevent future diversion
+- Zero breaking changes to existing Konveyor and AppCAT functionality
+
+### Data Sources
+**Goal**: Analyze divergences between upstream `konveyor/rulesets` and downstream `Azure/appcat-konveyor-rulesets` (main branches), focusing strictly on YAML rulesets.
+
+**Method**: Compare per-rule (semantic by `ruleID`) and per-file (syntactic). Produce compact summaries here and detailed CSVs in `reports/`.
+
+#### Per-rule analysis
+- **Identical rules**: {hi:,} (exact matches) — see `reports/per_rule_identical.csv`
+- **Modified rules**: {hm:,} (exist in both but have differences) — see `reports/per_rule_modified.csv`
+- **Unique to upstream**: {hu:,} (Konveyor-only) — see `reports/per_rule_unique_upstream.csv`
+- **Unique to downstream**: {hd:,} (AppCAT-only) — see `reports/per_rule_unique_downstream.csv`
+
+#### Per-file analysis
+- File-level differences — see `reports/per_file_*.csv`
+
+#### Branch analysis
+- Branches ahead of main — see `reports/branches_*.csv`
+
+---
+
+## How to run
+1. `pip install -r tools/requirements.txt`
+2. `python3 tools/orchestrate.py --run`
+3. Reset: `python3 tools/orchestrate.py --reset`
+
+**Outputs**: CSVs in `reports/`, logs in `tools/logs/run.log`, state in `tools/state.json`
+
+
+## Branch Analysis
+
+Both repositories have multiple branches with varying degrees of divergence from main:
+
+### Upstream Branches Ahead of Main
+- **Total branches ahead**: {up_branches}
+- **Most significant**: {up_branches} branches with pending changes
+- **Release branches**: Multiple release branches (0.3, 0.4, 0.5, 0.6, 0.7, 0.8)
+- **Cherry-pick branches**: Several cherry-pick branches for specific PRs
+
+### Downstream Branches Ahead of Main
+- **Total branches ahead**: {down_branches}
+- **Most significant**: {down_branches} branches with pending changes
+- **Feature branches**: Multiple feature branches from different contributors
+- **Release branches**: AppCAT-specific release branches (7.1.x.y, 7.6.x.y, 7.7.x.y)
+- **Dependabot branches**: Automated dependency update branches
+
+**Note**: These branches represent ongoing development work that may contain additional rules or enhancements not yet merged to main. Consider reviewing these branches for additional reconciliation opportunities.
+
+"""
 
 
 def step_write_readme(state):
-    ensure_dirs()
     readme = ROOT / "README.md"
     def count_rows(p):
-        if not p.exists():
-            return 0
         try:
-            with open(p, encoding="utf-8") as f:
-                return max(0, sum(1 for _ in f) - 1)
+            size = p.stat().st_size
+            if size == 0:
+                return 0
+            # Count newlines over a read-only mapping in 64 MiB windows; csv terminates every row, header included
+            n = 0
+            with open(p, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for start in range(0, size, 1 << 26):
+                    n += m[start:start + (1 << 26)].count(b"\n")
+            return max(0, n - 1)
         except Exception:
             return 0
     hi = count_rows(REPORTS / "per_rule_identical.csv")
@@ -853,12 +1310,9 @@ def step_write_readme(state):
     up_branches = count_rows(REPORTS / "branches_upstream.csv")
     down_branches = count_rows(REPORTS / "branches_downstream.csv")
     
-    # Generate detailed appendix
-    appendix = generate_detailed_appendix()
-    
-    # Load enhanced analysis data
+    # Load enhanced analysis data (read once; the appendix shares the change type counts)
     try:
-        analysis_data = json.loads((CACHE_DIR / "analysis_summary.json").read_text(encoding="utf-8"))
+        analysis_data = read_json(CACHE_DIR / "analysis_summary.json")
         change_type_counts = analysis_data.get("change_type_counts", {})
         category_counts = analysis_data.get("category_counts", {})
         category_change_types = analysis_data.get("category_change_types", {})
@@ -868,122 +1322,31 @@ def step_write_readme(state):
         category_counts = {"modified": {}, "unique_up": {}, "unique_down": {}}
         category_change_types = {}
     
+    # Generate detailed appendix
+    appendix_lines = generate_detailed_appendix_lines(change_type_counts, deep=DEEP_APPENDIX)
+    
     # Calculate reconciliation priorities
     total_rules = hi + hm + hu + hd
     sync_priority = "HIGH" if hm > total_rules * 0.5 else "MEDIUM" if hm > total_rules * 0.2 else "LOW"
+    ctx = {
+        "hi": hi,
+        "hm": hm,
+        "hu": hu,
+        "hd": hd,
+        "total_rules": total_rules,
+        "modified_pct": hm / total_rules * 100,
+        "covered": hi + hm,
+        "coverage_pct": (hi + hm) / total_rules * 100,
+        "sync_priority": sync_priority,
+        "up_branches": up_branches,
+        "down_branches": down_branches,
+    }
     
-    content = (
-        "AppCAT ↔ Konveyor rulesets reconciliation (YAML-focused)\n\n"
-        "## Executive Summary\n\n"
-        f"The analysis reveals significant divergence between Konveyor and AppCAT rulesets, with {hm:,} of {total_rules:,} rules ({((hm/total_rules)*100):.1f}%) having differences between repositories. The reconciliation strategy involves two phases: Phase 1 focuses on rule synchronization and schema harmonization, while Phase 2 establishes ongoing bidirectional sync workflows.\n\n"
-        f"**Upstream Changes (Konveyor)**: The primary changes will be adopting AppCAT's enhanced rule patterns, adding optional metadata fields (domain, category, message), and incorporating {hd} AppCAT-specific rules that provide value to the broader community. The unified schema will maintain backward compatibility while supporting richer rule descriptions and Azure-specific categorizations.\n\n"
-        f"**Downstream Changes (AppCAT)**: AppCAT will adopt {hu} missing rules from upstream Konveyor, ensuring comprehensive coverage of migration scenarios. The existing {hm:,} modified rules will be harmonized using the unified schema, preserving AppCAT's enhancements while aligning with upstream standards.\n\n"
-        f"**Key Numbers**: {total_rules:,} total rules, {hm:,} modified, {hu:,} unique upstream, {hd:,} unique downstream\n\n"
-        "## Proposed Unified Schema\n\n"
-        "The reconciliation plan proposes a unified YAML schema that combines the best of both repositories while maintaining backward compatibility:\n\n"
-        "```yaml\n"
-        "# Example unified rule schema\n"
-        "- ruleID: azure-cache-redis-01000                    # Required: unique identifier\n"
-        "  description: \"Application uses Redis cache\"        # Required: human-readable description\n"
-        "  message: \"Consider migrating to Azure Cache for Redis\"  # Optional: AppCAT enhancement\n"
-        "  domain: \"azure\"                                    # Optional: AppCAT categorization\n"
-        "  category: \"cache\"                                  # Optional: AppCAT subcategory\n"
-        "  tag: [\"Redis\", \"Cache\", \"Azure\"]                   # Required: tags for classification\n"
-        "  labels: [\"konveyor.io/include=always\"]             # Required: Konveyor labels\n"
-        "  effort: \"medium\"                                   # Optional: migration effort estimate\n"
-        "  links: []                                          # Required: documentation links\n"
-        "  customVariables: []                                # Required: custom variables\n"
-        "  when:                                             # Required: condition logic\n"
-        "    builtin.file:\n"
-        "      pattern: \".*redis.*\\\\.jar\"                     # Enhanced regex patterns from AppCAT\n"
-        "  # Additional AppCAT-specific fields (optional):\n"
-        "  metadata:                                          # Optional: rich metadata\n"
-        "    severity: \"medium\"\n"
-        "    confidence: \"high\"\n"
-        "    migrationPath: \"azure-cache-redis\"\n"
-        "```\n\n"
-        "**Schema Changes Summary**:\n"
-        "- **Additions**: `message`, `domain`, `category`, `metadata` fields (AppCAT enhancements)\n"
-        "- **Enhancements**: Improved regex patterns in `when` conditions\n"
-        "- **Backward Compatibility**: All existing Konveyor fields preserved\n"
-        "- **Optional Fields**: New fields are optional to maintain compatibility\n\n"
-        "## AppCAT Enhancements to Rulesets\n\n"
-        "AppCAT has significantly enhanced the rule detection logic compared to Konveyor, with 2,140 of 2,941 rules (72.8%) having improvements. The enhancements fall into three main categories:\n\n"
-        "### 1. Enhanced Regex Patterns (68.3% of changes)\n\n"
-        "**Konveyor (Simple)**:\n"
-        "```yaml\n"
-        "when:\n"
-        "  builtin.file:\n"
-        "    pattern: \".*liferay.*\\\\.jar\"\n"
-        "```\n\n"
-        "**AppCAT (Enhanced)**:\n"
-        "```yaml\n"
-        "when:\n"
-        "  builtin.file:\n"
-        "    pattern: \"^([a-zA-Z0-9._-]*)liferay([a-zA-Z0-9._-]*)\\\\.jar$\"\n"
-        "```\n\n"
-        "**Key Improvements**:\n"
-        "- **More Precise Matching**: Uses `^` and `$` anchors for exact matching\n"
-        "- **Structured Capture Groups**: `([a-zA-Z0-9._-]*)` captures version prefixes/suffixes\n"
-        "- **Reduced False Positives**: Prevents matching files like `not-liferay-something.jar`\n\n"
-        "### 2. Dependency Detection Integration (24.5% of changes)\n\n"
-        "**Konveyor (File-only)**:\n"
-        "```yaml\n"
-        "when:\n"
-        "  builtin.file:\n"
-        "    pattern: \"spring-boot.*\\\\.jar\"\n"
-        "```\n\n"
-        "**AppCAT (Multi-layered)**:\n"
-        "```yaml\n"
-        "when:\n"
-        "  or:\n"
-        "    - java.dependency:\n"
-        "        lowerbound: \"0.0.0\"\n"
-        "        name: \"org.springframework.spring-boot\"\n"
-        "    - builtin.file:\n"
-        "        pattern: \"^spring-boot([a-zA-Z0-9._-]*)\\\\.jar$\"\n"
-        "```\n\n"
-        "**Key Improvements**:\n"
-        "- **Maven/Gradle Detection**: Checks actual dependency declarations, not just JAR files\n"
-        "- **Fallback Logic**: Still checks JAR files if dependency detection fails\n"
-        "- **More Accurate**: Catches dependencies even when JAR names don't match patterns\n\n"
-        "### 3. Complex Multi-Condition Logic (6.0% of changes)\n\n"
-        "**Konveyor (Single condition)**:\n"
-        "```yaml\n"
-        "when:\n"
-        "  builtin.filecontent:\n"
-        "    filePattern: \".*\\\\.(java|properties|yaml|yml)\"\n"
-        "    pattern: \"\\\\.\\\\/.\"\n"
-        "```\n\n"
-        "**AppCAT (Comprehensive)**:\n"
-        "```yaml\n"
-        "when:\n"
-        "  or:\n"
-        "    - builtin.filecontent:\n"
-        "        filePattern: \"(/|\\\\\\\\)([a-zA-Z0-9._-]+)\\\\.(java|properties|yaml|yml|xml)$\"\n"
-        "        pattern: \"^(\\\\\\\\.{1,2}\\\\/[-\\\\w\\\\/.]+)\"\n"
-        "    - java.referenced:\n"
-        "        location: \"PACKAGE\"\n"
-        "        pattern: \"com.amazonaws.services.s3*\"\n"
-        "    - java.dependency:\n"
-        "        name: \"com.amazonaws.aws-java-sdk-s3\"\n"
-        "```\n\n"
-        "**Key Improvements**:\n"
-        "- **Multiple Detection Methods**: File content, package references, and dependencies\n"
-        "- **Broader Coverage**: Catches usage patterns that file scanning might miss\n"
-        "- **Azure-Specific**: Tailored for Azure migration scenarios\n\n"
-        "### 4. Build Tool Integration\n\n"
-        "**AppCAT adds support for**:\n"
-        "- **Gradle**: `build.gradle` and `build.gradle.kts` files\n"
-        "- **Maven**: Enhanced XPath queries for `pom.xml`\n"
-        "- **Multiple Java Version Detection**: Checks `sourceCompatibility`, `targetCompatibility`, etc.\n\n"
-        "### Why These Enhancements Matter\n\n"
-        "1. **Accuracy**: AppCAT's patterns reduce false positives by being more specific\n"
-        "2. **Completeness**: Dependency detection catches cases where JAR files aren't present\n"
-        "3. **Azure Focus**: Rules are tailored for Azure migration scenarios\n"
-        "4. **Modern Build Tools**: Support for Gradle and modern Maven configurations\n"
-        "5. **Comprehensive Coverage**: Multiple detection methods ensure nothing is missed\n\n"
-        "The unified schema preserves these AppCAT enhancements while maintaining backward compatibility with Konveyor's simpler patterns, giving users the best of both worlds.\n\n"
+    # README fragments are collected in a list and written out in order at the end
+    parts = []
+    parts.append(_README_TEMPLATE.format_map(ctx))
+    parts.append(_APPCAT_NARRATIVE)
+    parts.append(
         "## Analysis Details\n\n"
         "### Change Type Breakdown\n"
         f"The {hm:,} modified rules break down as follows:\n"
@@ -993,123 +1356,53 @@ def step_write_readme(state):
     if change_type_counts:
         for change_type, count in sorted(change_type_counts.items(), key=lambda x: -x[1]):
             percentage = (count / hm * 100) if hm > 0 else 0
-            change_desc = {
-                "field_additions": "Field additions only (new YAML fields added)",
-                "field_values": "Field value changes only (existing fields with different values)",
-                "description_only": "Description changes only (only description field differs)",
-                "regex_pattern": "Regex/pattern changes (when/pattern fields differ)",
-                "condition_logic": "Condition logic changes (when field structure differs)",
-                "mixed_changes": "Mixed changes (multiple types above)",
-                "structural_changes": "Structural changes (other complex differences)",
-                "field_removals": "Field removals (fields removed from downstream)"
-            }.get(change_type, change_type)
+            change_desc = _CHANGE_TYPE_DESC.get(change_type, change_type)
             
             # Add field names for field_values type
             if change_type == "field_values":
-                content += f"- **{change_desc}**: {count:,} rules ({percentage:.1f}%) — see [field value changes table](#field-value-changes-table) for field names and rule details\n"
+                parts.append(f"- **{change_desc}**: {count:,} rules ({percentage:.1f}%) — see [field value changes table](#field-value-changes-table) for field names and rule details\n")
             else:
-                content += f"- **{change_desc}**: {count:,} rules ({percentage:.1f}%) — see [change type table](#change-type-tables) for rule details\n"
+                parts.append(f"- **{change_desc}**: {count:,} rules ({percentage:.1f}%) — see [change type table](#change-type-tables) for rule details\n")
     else:
-        content += "- Analysis data not available\n"
+        parts.append("- Analysis data not available\n")
     
-    content += (
+    parts.append(
         "\n### Category Breakdown\n"
         "Analysis by rule category showing where biggest differences are:\n"
     )
     
     # Add category breakdown with detailed change types
-    for category in ["Azure rules", "Java framework rules", "Cloud readiness rules", "Technology usage rules", "Discovery rules", "Other/Uncategorized"]:
-        modified_count = category_counts.get("modified", {}).get(category, 0)
-        unique_up_count = category_counts.get("unique_up", {}).get(category, 0)
-        unique_down_count = category_counts.get("unique_down", {}).get(category, 0)
-        if modified_count > 0 or unique_up_count > 0 or unique_down_count > 0:
-            content += f"- **{category}**: {modified_count} modified, {unique_up_count} unique upstream, {unique_down_count} unique downstream\n"
-            
-            # Add detailed change types within this category
-            if category in category_change_types:
-                change_types = category_change_types[category]
-                change_details = []
-                if change_types.get("description", 0) > 0:
-                    change_details.append(f"description ({change_types['description']})")
-                if change_types.get("metadata", 0) > 0:
-                    change_details.append(f"metadata ({change_types['metadata']})")
-                if change_types.get("source/target", 0) > 0:
-                    change_details.append(f"source/target ({change_types['source/target']})")
-                if change_types.get("regex", 0) > 0:
-                    change_details.append(f"regex ({change_types['regex']})")
-                if change_types.get("other", 0) > 0:
-                    change_details.append(f"other ({change_types['other']})")
-                
-                if change_details:
-                    content += f"  - Change types within {category}: {', '.join(change_details)}\n"
+    mod_counts = category_counts.get("modified", {})
+    up_counts = category_counts.get("unique_up", {})
+    dn_counts = category_counts.get("unique_down", {})
+    for category in _CATEGORY_ORDER:
+        modified_count = mod_counts.get(category, 0)
+        unique_up_count = up_counts.get(category, 0)
+        unique_down_count = dn_counts.get(category, 0)
+        if not (modified_count > 0 or unique_up_count > 0 or unique_down_count > 0):
+            continue
+        parts.append(f"- **{category}**: {modified_count} modified, {unique_up_count} unique upstream, {unique_down_count} unique downstream\n")
+        
+        # Add detailed change types within this category
+        change_types = category_change_types.get(category)
+        if not change_types:
+            continue
+        change_details = []
+        for k in _CT_KEYS:
+            v = change_types.get(k, 0)
+            if v > 0:
+                change_details.append(f"{k} ({v})")
+        if change_details:
+            parts.append(f"  - Change types within {category}: {', '.join(change_details)}\n")
     
-    content += (
-        "\n### Recommended Reconciliation Plan\n"
-        f"**Priority: {sync_priority}** - {hm:,} of {total_rules:,} rules have diverged between repos\n\n"
-        "#### Phase 1: Rule Synchronization and Schema Harmonization\n"
-        f"1. **Merge {hu} upstream-only rules** into AppCAT downstream\n"
-        f"   - These rules exist in Konveyor but are missing from AppCAT\n"
-        f"   - See `reports/per_rule_unique_upstream.csv` for full list\n"
-        f"   - Low risk: pure additions to downstream\n\n"
-        f"2. **Review {hd} downstream-only rules** for upstream contribution\n"
-        f"   - AppCAT-specific rules that could benefit Konveyor community\n"
-        f"   - See `reports/per_rule_unique_downstream.csv` for full list\n"
-        f"   - Focus on Azure-specific enhancements\n\n"
-        f"3. **Harmonize {hm:,} modified rules** using unified schema\n"
-        f"   - Most changes are additive (message fields, enhanced regex patterns)\n"
-        f"   - See detailed analysis in appendix below\n"
-        f"   - Propose unified superset schema to Konveyor maintainers\n\n"
-        "#### Phase 2: Bidirectional Sync Workflow\n"
-        "4. **Establish bidirectional sync workflow**\n"
-        "   - **Upstream → Downstream**: Pull new rules from Konveyor, merge with AppCAT enhancements\n"
-        "   - **Downstream → Upstream**: Push enhanced rules back to Konveyor with AppCAT metadata\n"
-        "   - **Schema strategy**: Unified superset with optional AppCAT fields (domain, category, message)\n"
-        "   - **Conflict resolution**: Prefer downstream enhancements for existing rules, merge new rules from upstream\n\n"
-        "#### Schema Unification Strategy\n"
-        "- **Keep `ruleID` canonical** - this is the primary key for rule matching\n"
-        "- **Add optional AppCAT fields** - domain, category, message as extensions\n"
-        "- **Enhanced patterns** - downstream regex improvements should be adopted upstream\n"
-        "- **Condition logic** - downstream OR conditions and dependency checks are improvements\n\n"
-        "#### Success Metrics\n"
-        f"- Reduce modified rules from {hm:,} to <100 through schema unification\n"
-        f"- Achieve 95%+ rule coverage (currently {hi + hm:,}/{total_rules:,} = {((hi + hm)/total_rules*100):.1f}%)\n"
-        "- Establish an agreed upon sync cadence or new process to prevent future diversion\n"
-        "- Zero breaking changes to existing Konveyor and AppCAT functionality\n\n"
-        "### Data Sources\n"
-        "**Goal**: Analyze divergences between upstream `konveyor/rulesets` and downstream `Azure/appcat-konveyor-rulesets` (main branches), focusing strictly on YAML rulesets.\n\n"
-        "**Method**: Compare per-rule (semantic by `ruleID`) and per-file (syntactic). Produce compact summaries here and detailed CSVs in `reports/`.\n\n"
-        "#### Per-rule analysis\n"
-        f"- **Identical rules**: {hi:,} (exact matches) — see `reports/per_rule_identical.csv`\n"
-        f"- **Modified rules**: {hm:,} (exist in both but have differences) — see `reports/per_rule_modified.csv`\n"
-        f"- **Unique to upstream**: {hu:,} (Konveyor-only) — see `reports/per_rule_unique_upstream.csv`\n"
-        f"- **Unique to downstream**: {hd:,} (AppCAT-only) — see `reports/per_rule_unique_downstream.csv`\n\n"
-        "#### Per-file analysis\n"
-        "- File-level differences — see `reports/per_file_*.csv`\n\n"
-        "#### Branch analysis\n"
-        "- Branches ahead of main — see `reports/branches_*.csv`\n\n"
-        "---\n\n"
-        "## How to run\n"
-        "1. `pip install -r tools/requirements.txt`\n"
-        "2. `python3 tools/orchestrate.py --run`\n"
-        "3. Reset: `python3 tools/orchestrate.py --reset`\n\n"
-        "**Outputs**: CSVs in `reports/`, logs in `tools/logs/run.log`, state in `tools/state.json`\n\n"
-        f"\n## Branch Analysis\n\n"
-        f"Both repositories have multiple branches with varying degrees of divergence from main:\n\n"
-        f"### Upstream Branches Ahead of Main\n"
-        f"- **Total branches ahead**: {up_branches}\n"
-        f"- **Most significant**: {up_branches} branches with pending changes\n"
-        f"- **Release branches**: Multiple release branches (0.3, 0.4, 0.5, 0.6, 0.7, 0.8)\n"
-        f"- **Cherry-pick branches**: Several cherry-pick branches for specific PRs\n\n"
-        f"### Downstream Branches Ahead of Main\n"
-        f"- **Total branches ahead**: {down_branches}\n"
-        f"- **Most significant**: {down_branches} branches with pending changes\n"
-        f"- **Feature branches**: Multiple feature branches from different contributors\n"
-        f"- **Release branches**: AppCAT-specific release branches (7.1.x.y, 7.6.x.y, 7.7.x.y)\n"
-        f"- **Dependabot branches**: Automated dependency update branches\n\n"
-        f"**Note**: These branches represent ongoing development work that may contain additional rules or enhancements not yet merged to main. Consider reviewing these branches for additional reconciliation opportunities.\n\n"
-        f"{appendix}\n"
-    )
-    readme.write_text(content, encoding="utf-8")
+    parts.append(_README_PLAN_TEMPLATE.format_map(ctx))
+    # Stream fragments and appendix lines through a buffered writer rather than
+    # assembling the whole README (mostly appendix) as one string first
+    with open(readme, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(parts)
+        for line in appendix_lines:
+            f.write(line)
+            f.write("\n")
     state["write_readme"] = True
     save_state(state)
 
@@ -1120,7 +1413,11 @@ def main():
     parser.add_argument("--reset", action="store_true")
     parser.add_argument("--force-step", dest="force_step", default=None)
     parser.add_argument("--set-step", dest="set_step", default=None, help="name=true|false")
+    parser.add_argument("--deep-appendix", dest="deep_appendix", action="store_true",
+                        help="use DeepDiff for the README appendix (nested paths, slower)")
     args = parser.parse_args()
+    global DEEP_APPENDIX
+    DEEP_APPENDIX = args.deep_appendix
 
     check_repos()
     if args.reset:
@@ -1149,10 +1446,15 @@ def main():
         ("write_readme", step_write_readme),
     ]
 
+    # Steps rely on these directories existing; create them once per run
     ensure_dirs()
 
+    # --deep-appendix only changes the README, so it always rebuilds it
+    forced = {args.force_step} | ({"write_readme"} if args.deep_appendix else set())
+    skipped = []
     for name, func in steps:
-        if args.force_step == name or not state.get(name, False) or args.force_step == "all" or args.run:
+        # Steps already marked done are skipped unless forced by name or with --force-step all
+        if name in forced or "all" in forced or not state.get(name, False):
             try:
                 log(f"step start: {name}")
                 func(state)
@@ -1160,6 +1462,10 @@ def main():
             except Exception as e:
                 log(f"step error {name}: {e}")
                 # continue next steps
+        else:
+            skipped.append(name)
+    if skipped:
+        print(f"Skipped steps already done: {', '.join(skipped)}. Use --force-step <name>|all or --reset to re-run.")
 
 
 if __name__ == "__main__":